@@ -1,29 +1,163 @@
-from urllib.parse import urlparse
+import importlib.metadata
+import os
+import re
+import shutil
+import subprocess
 import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from pathlib import Path
-from typing import List, Optional
-from urllib.parse import urlparse
+from typing import List, Optional, Tuple
+from urllib.parse import urlsplit
 
 from .types import StoryBuild, StoryMention, StorySticker
 
+# moviepy is imported lazily where it is used, moviepy.editor pulls in every effect and audio module.
+# Check the version here instead, the moviepy 1.x submodules used below do not exist in 2.x
 try:
-    from moviepy.editor import CompositeVideoClip, ImageClip, TextClip, VideoFileClip
-except ImportError:
+    moviepy_version = importlib.metadata.version("moviepy")
+except importlib.metadata.PackageNotFoundError:
+    moviepy_version = ""
+if not moviepy_version.startswith("1."):
     raise Exception("Please install moviepy==1.0.3 and retry")
 
+import numpy as np
+
 try:
-    from PIL import Image
+    from PIL import Image, ImageDraw, ImageFont
 except ImportError:
     raise Exception("You don't have PIL installed. Please install PIL or Pillow>=8.1.1")
 
+# x264 settings for story encoding: short 720x1280 clips do not benefit
+# from the slower presets, so trade a little bitrate for encode speed
+X264_PARAMS = ["-preset", "ultrafast", "-tune", "zerolatency", "-crf", "23", "-threads", "0"]
+# NVENC settings used instead of libx264 when an NVIDIA encoder is available,
+# forced keyframes must be IDR frames for the stream-copy split
+NVENC_PARAMS = ["-preset", "p4", "-tune", "hq", "-rc", "vbr", "-cq", "23", "-pix_fmt", "yuv420p", "-forced-idr", "1"]
+# Pixel formats with an alpha channel (yuva420p, rgba, bgra, ya8, gbrap, ...)
+ALPHA_PIX_FMT_PREFIXES = ("yuva", "rgba", "bgra", "argb", "abgr", "ya", "gbrap")
+# Story frame dimensions
+STORY_W, STORY_H = 720, 1280
+# Frame rate of built stories
+STORY_FPS = 24
+# Instagram accepts at most 15 seconds per story video
+SEGMENT_DURATION = 15
+
+
+def _ffmpeg_binary() -> str:
+    """
+    Path to the ffmpeg binary configured for moviepy
+    """
+    from moviepy.config import get_setting
+
+    return get_setting("FFMPEG_BINARY")
+
+
+@lru_cache(maxsize=None)
+def _video_encoder() -> Tuple[str, List[str]]:
+    """
+    Detect the H.264 encoder once: h264_nvenc on NVIDIA hosts, libx264 otherwise
+
+    ffmpeg lists h264_nvenc whenever it was built with it, even on GPUs without
+    NVENC or with no free encode session, so a one-frame test encode is used.
+    """
+    if shutil.which("nvidia-smi"):
+        try:
+            subprocess.run(
+                [
+                    _ffmpeg_binary(), "-hide_banner", "-loglevel", "error",
+                    "-f", "lavfi", "-i", "nullsrc=s=256x256",
+                    "-frames:v", "1",
+                    "-c:v", "h264_nvenc",
+                    "-f", "null", "-",
+                ],
+                capture_output=True,
+                check=True,
+                timeout=30,
+            )
+        except (OSError, subprocess.CalledProcessError, subprocess.TimeoutExpired):
+            pass
+        else:
+            return "h264_nvenc", NVENC_PARAMS
+    return "libx264", X264_PARAMS
+
+
+def _has_alpha(path: Path) -> bool:
+    """
+    Check whether the first video stream of a file carries an alpha channel
+    """
+    proc = subprocess.run(
+        [_ffmpeg_binary(), "-hide_banner", "-i", str(path)],
+        capture_output=True,
+        text=True,
+    )
+    match = re.search(r"Video: [^,]+, (\w+)", proc.stderr)
+    return bool(match) and match.group(1).startswith(ALPHA_PIX_FMT_PREFIXES)
+
+
+def _copy_segment(path: str, start: int, end: int, destination: str) -> str:
+    """
+    Cut [start, end) seconds of a video into destination with stream copy
+    """
+    subprocess.run(
+        [
+            _ffmpeg_binary(), "-y", "-loglevel", "error",
+            "-ss", str(start), "-i", path,
+            "-t", str(end - start),
+            "-c", "copy",
+            "-avoid_negative_ts", "make_zero",
+            destination,
+        ],
+        check=True,
+    )
+    return destination
+
+
+def _load_font(font: str, fontsize: int):
+    """
+    Load a TrueType font by name or path, falling back to Pillow's default font
+
+    Pillow>=10.1 ships a scalable default font, older versions only have a small
+    bitmap font that does not take a size.
+    """
+    for name in (font, f"{font}.ttf"):
+        try:
+            return ImageFont.truetype(name, fontsize)
+        except OSError:
+            continue
+    try:
+        return ImageFont.load_default(fontsize)
+    except TypeError:
+        return ImageFont.load_default()
+
+
+@lru_cache(maxsize=256)
+def _render_text(text: str, color: str, font: str, fontsize: int, max_width: int, bg_color: Optional[str] = None):
+    """
+    Render text into an RGBA array scaled to max_width
+
+    The result is cached, so repeated captions (batch uploads) are drawn only once.
+    The returned array is shared between callers and therefore read-only.
+    """
+    pil_font = _load_font(font, fontsize)
+    draw = ImageDraw.Draw(Image.new("RGBA", (1, 1)))
+    left, top, right, bottom = draw.textbbox((0, 0), text, font=pil_font)
+    image = Image.new("RGBA", (max(right - left, 1), max(bottom - top, 1)), bg_color or (0, 0, 0, 0))
+    ImageDraw.Draw(image).text((-left, -top), text, fill=color, font=pil_font)
+    height = max(int(image.height * max_width / image.width), 1)
+    image = image.resize((max_width, height), Image.LANCZOS)
+    arr = np.asarray(image)
+    arr.setflags(write=False)
+    return arr
+
 
 class StoryBuilder:
     """
     Helpers for Story building
     """
 
-    width = 720
-    height = 1280
+    width = STORY_W
+    height = STORY_H
 
     def __init__(self, path: Path, caption: str = "", mentions: Optional[List[StoryMention]] = None, bgpath: Optional[Path] = None):
         """
@@ -111,8 +245,17 @@ class StoryBuilder:
         StoryBuild
             An object of StoryBuild
         """
+        from moviepy.video.compositing.CompositeVideoClip import CompositeVideoClip
+        from moviepy.video.fx.fadein import fadein
+        from moviepy.video.VideoClip import ImageClip
+
         clips = []
+        # フェードインするテキストレイヤー (ImageClip, 秒数)。動画は moviepy、静止画は ffmpeg でフェードさせる
+        overlays = []
         stickers = []
+        # 寸法はクラス属性 (サブクラスで変更可) から一度だけ読み出す
+        story_size = (self.width, self.height)
+        story_width, story_height = story_size
 
         # 1) 背景クリップ追加
         if self.bgpath:
@@ -121,13 +264,19 @@ class StoryBuilder:
             clips.append(background)
 
         # 2) メイン (動画/画像) クリップの配置
-        clip_left = (self.width - clip.size[0]) / 2
-        clip_top = (self.height - clip.size[1]) / 2
+        clip_left = (story_width - clip.size[0]) / 2
+        clip_top = (story_height - clip.size[1]) / 2
         # もし上下の余白が多いなら若干上に持ち上げる
         if clip_top > 90:
             clip_top -= 50
 
-        media_clip = clip.set_position((clip_left, clip_top))
+        padded = not self.bgpath and not isinstance(clip, ImageClip) and clip.mask is None
+        if padded:
+            # 背景のない不透明な動画は画面サイズのバッファに書き込んで合成のベースにし、
+            # フレーム毎の位置計算と空キャンバスへの転送を省く
+            media_clip = self._pad_clip(clip, int(clip_left), int(clip_top), story_size)
+        else:
+            media_clip = clip.set_position((clip_left, clip_top))
         clips.append(media_clip)
 
         # 3) キャプション (mentions があればユーザ名をキャプションに使う)
@@ -137,6 +286,7 @@ class StoryBuilder:
         # 4) キャプション用テキストクリップ (共通処理で生成)
         text_clip = None
         if caption_text:
+            caption_fadein = 3.0
             text_clip = self._create_text_clip(
                 text=caption_text,
                 color=color,
@@ -146,17 +296,16 @@ class StoryBuilder:
                 pos_top=clip_top + clip.size[1] + 50,
             )
             if text_clip:
-                clips.append(text_clip)
+                overlays.append((text_clip, caption_fadein))
 
         # 5) リンクテキストクリップ
         if link:
             # リンク文字列から表示用ドメインなどを抽出
-            url = urlparse(link)
-            link_text = url.netloc if url.netloc else link
+            link_text = urlsplit(link).netloc or link
 
             # 座標や幅が指定されていなければデフォルト計算
             if link_clip_left is None:
-                link_clip_left = (self.width - link_clip_width) / 2
+                link_clip_left = (story_width - link_clip_width) / 2
             if link_clip_top is None:
                 link_clip_top = clip.size[1] / 2
 
@@ -167,20 +316,20 @@ class StoryBuilder:
                 fontsize=link_fontsize,
                 max_width=link_clip_width,
                 bg_color=link_bg_color,
-                fadein_sec=link_fadein,
                 pos_left=link_clip_left,
                 pos_top=link_clip_top,
             )
 
             if link_clip_obj:
-                clips.append(link_clip_obj)
+                overlays.append((link_clip_obj, link_fadein))
                 # ステッカー(Sticker)を生成
+                x, y, width, height = self._norm_rect(link_clip_left, link_clip_top, *link_clip_obj.size)
                 link_sticker = StorySticker(
-                    x=round(link_clip_left / self.width, 7),
-                    y=round(link_clip_top / self.height, 7),
+                    x=x,
+                    y=y,
                     z=link_sticker_z,
-                    width=round(link_clip_obj.size[0] / self.width, 7),
-                    height=round(link_clip_obj.size[1] / self.height, 7),
+                    width=width,
+                    height=height,
                     rotation=link_sticker_rotation,
                     type="story_link",
                     extra=dict(
@@ -201,24 +350,362 @@ class StoryBuilder:
         duration = self._calculate_duration(clip, max_duration)
 
         # 8) クリップを合成
-        destination = tempfile.mktemp(".mp4")
-        cvc = CompositeVideoClip(clips, size=(self.width, self.height)).set_fps(24).set_duration(duration)
-        cvc.write_videofile(destination, codec="libx264", audio=True, audio_codec="aac")
-
-        # 9) 15秒以上の場合、分割書き出し
-        paths = []
-        if duration > 15:
-            for i in range(duration // 15 + (1 if duration % 15 else 0)):
-                path = tempfile.mktemp(".mp4")
-                start = i * 15
-                rest = duration - start
-                end = start + (rest if rest < 15 else 15)
-                sub = cvc.subclip(start, end)
-                sub.write_videofile(path, codec="libx264", audio=True, audio_codec="aac")
-                paths.append(path)
+        # 分割時に stream copy で切れるよう 15 秒ごとにキーフレームを強制する
+        with tempfile.NamedTemporaryFile(suffix=".mp4", delete=False) as fp:
+            destination = fp.name
+        try:
+            keyframe_params = ["-force_key_frames", f"expr:gte(t,n_forced*{SEGMENT_DURATION})"]
+            if isinstance(clip, ImageClip):
+                # 静止画のみの場合は背景と画像を一度だけ合成し、moviepy を介さず ffmpeg でループさせる
+                # テキストは別入力として重ね、フェードインを保つ
+                frame = self._compose_still(clips, story_size)
+                self._encode_still(frame, destination, duration, keyframe_params, overlays)
+            else:
+                # 元動画が 24fps 前後ならそのまま書き出し、フレームの間引き・重複を避ける
+                # 分割する場合は 15 秒ちょうどにフレーム (キーフレーム) が来るよう STORY_FPS に揃える
+                source_fps = getattr(clip, "fps", None)
+                fps = STORY_FPS
+                if source_fps and abs(source_fps - STORY_FPS) < 1 and duration <= SEGMENT_DURATION:
+                    fps = source_fps
+                clips += [layer.fx(fadein, fadein_sec) for layer, fadein_sec in overlays]
+                if len(clips) == 1 and tuple(media_clip.size) == story_size and media_clip.mask is None:
+                    # 背景・テキストがなく不透明なメインクリップが画面全体を覆う場合は合成を省略する
+                    # (write_videofile はマスクを無視するため、透過のあるクリップは合成を通す)
+                    cvc = media_clip.set_fps(fps).set_duration(duration)
+                elif padded:
+                    # use_bgclip では先頭クリップの音声が合成に含まれないため付け直す
+                    cvc = CompositeVideoClip(clips, size=story_size, use_bgclip=True).set_audio(media_clip.audio)
+                    cvc = cvc.set_fps(fps).set_duration(duration)
+                else:
+                    cvc = CompositeVideoClip(clips, size=story_size).set_fps(fps).set_duration(duration)
+                codec, codec_params = _video_encoder()
+                # 音声トラックがない場合は AAC エンコードを行わない
+                audio = any(getattr(c, "audio", None) is not None for c in clips)
+                cvc.write_videofile(
+                    destination,
+                    codec=codec,
+                    audio=audio,
+                    audio_codec="aac" if audio else None,
+                    ffmpeg_params=codec_params + keyframe_params,
+                )
+
+            # 9) 15秒以上の場合、再エンコードせずに分割
+            paths = []
+            if duration > SEGMENT_DURATION:
+                paths = self._split_video(destination, duration)
+        except Exception:
+            # 予約済みの出力ファイルを残さない
+            Path(destination).unlink(missing_ok=True)
+            raise
 
         return StoryBuild(mentions=mentions, path=destination, paths=paths, stickers=stickers)
 
+    def _pad_clip(self, clip, left: int, top: int, size: Tuple[int, int]):
+        """
+        Place an opaque clip on a frame-sized canvas
+
+        Every frame of the source is copied into one reused buffer at (left, top),
+        so the result can be composited at (0, 0) without a position callback.
+
+        Parameters
+        ----------
+        clip : VideoClip
+            Opaque RGB clip
+        left : int
+            Left position in pixels
+        top : int
+            Top position in pixels
+        size : Tuple[int, int]
+            Width and height of the canvas
+
+        Returns
+        -------
+        VideoClip
+            Clip of the canvas size with the audio of the source clip
+        """
+        from moviepy.video.VideoClip import VideoClip
+
+        width, height = size
+        clip_width, clip_height = clip.size
+        x0, y0 = max(left, 0), max(top, 0)
+        x1, y1 = min(left + clip_width, width), min(top + clip_height, height)
+        canvas = np.zeros((height, width, 3), dtype="uint8")
+
+        def make_frame(t):
+            canvas[y0:y1, x0:x1] = clip.get_frame(t)[y0 - top:y1 - top, x0 - left:x1 - left]
+            return canvas
+
+        padded = VideoClip(make_frame, duration=clip.duration).set_audio(clip.audio)
+        padded.fps = getattr(clip, "fps", None)
+        return padded
+
+    def _compose_still(self, clips: list, size: Tuple[int, int]):
+        """
+        Flatten positioned ImageClips into a single story frame
+
+        Parameters
+        ----------
+        clips : list
+            ImageClips in paint order
+        size : Tuple[int, int]
+            Width and height of the frame
+
+        Returns
+        -------
+        numpy.ndarray
+            RGB frame of the given size
+        """
+        canvas = Image.new("RGB", size)
+        for layer in clips:
+            image = self._layer_image(layer)
+            left, top = layer.pos(0)
+            canvas.paste(image, (int(left), int(top)), image if image.mode == "RGBA" else None)
+        return np.asarray(canvas)
+
+    def _layer_image(self, layer):
+        """
+        Get the picture of an ImageClip, with its mask as alpha channel
+
+        Parameters
+        ----------
+        layer : ImageClip
+            Static clip
+
+        Returns
+        -------
+        PIL.Image.Image
+            RGBA image when the clip has a mask, RGB otherwise
+        """
+        image = Image.fromarray(layer.img).convert("RGB")
+        if layer.mask is not None:
+            image.putalpha(Image.fromarray((layer.mask.img * 255).astype("uint8")))
+        return image
+
+    def _encode_still(
+        self,
+        frame,
+        destination: str,
+        duration: int,
+        ffmpeg_params: Optional[List[str]] = None,
+        overlays: Optional[list] = None,
+    ) -> None:
+        """
+        Encode a single frame as a video by letting ffmpeg loop it
+
+        Parameters
+        ----------
+        frame : numpy.ndarray
+            RGB frame of the story size
+        destination : str
+            Path for the encoded video
+        duration : int
+            Duration of the video in seconds
+        ffmpeg_params : List[str], optional
+            Extra output parameters for ffmpeg
+        overlays : list, optional
+            (ImageClip, fade-in seconds) pairs drawn over the frame in order,
+            each fades in through its alpha channel
+        """
+        stills = []
+        inputs = []
+        filters = []
+        last = "0:v"
+        try:
+            images = [Image.fromarray(frame)] + [self._layer_image(layer) for layer, _ in overlays or []]
+            for image in images:
+                with tempfile.NamedTemporaryFile(suffix=".png", delete=False) as fp:
+                    stills.append(fp.name)
+                image.save(fp.name)
+                inputs += ["-loop", "1", "-framerate", str(STORY_FPS), "-i", fp.name]
+            for i, (layer, fadein_sec) in enumerate(overlays or [], start=1):
+                left, top = layer.pos(0)
+                fade = f",fade=t=in:st=0:d={fadein_sec}:alpha=1" if fadein_sec else ""
+                filters.append(f"[{i}:v]format=rgba{fade}[t{i}]")
+                filters.append(f"[{last}][t{i}]overlay={int(left)}:{int(top)}[v{i}]")
+                last = f"v{i}"
+            graph = ["-filter_complex", ";".join(filters), "-map", f"[{last}]"] if filters else []
+            # 動画と同じ x264 設定を使い、tune のみ静止画向けにする
+            x264_params = list(X264_PARAMS)
+            x264_params[x264_params.index("-tune") + 1] = "stillimage"
+            subprocess.run(
+                [
+                    _ffmpeg_binary(), "-y", "-loglevel", "error",
+                    *inputs,
+                    *graph,
+                    "-t", str(duration),
+                    "-r", str(STORY_FPS),
+                    "-pix_fmt", "yuv420p",
+                    "-c:v", "libx264", *x264_params,
+                    *(ffmpeg_params or []),
+                    destination,
+                ],
+                check=True,
+            )
+        finally:
+            for still in stills:
+                Path(still).unlink()
+
+    def _norm_rect(self, left: float, top: float, width: float, height: float) -> Tuple[float, float, float, float]:
+        """
+        Normalize a pixel rectangle to fractions of the story frame
+
+        Parameters
+        ----------
+        left : float
+            Left position in pixels
+        top : float
+            Top position in pixels
+        width : float
+            Width in pixels
+        height : float
+            Height in pixels
+
+        Returns
+        -------
+        Tuple[float, float, float, float]
+            x, y, width and height rounded to 7 digits
+        """
+        frame = np.array([self.width, self.height, self.width, self.height], dtype=float)
+        return tuple(np.round(np.array([left, top, width, height], dtype=float) / frame, 7).tolist())
+
+    def _get_caption_text(self, mention: Optional[StoryMention]) -> str:
+        """
+        Get text for the caption clip
+
+        Parameters
+        ----------
+        mention : StoryMention, optional
+            First mention of the story, its username replaces the caption
+
+        Returns
+        -------
+        str
+            Caption text
+        """
+        if mention and getattr(mention, "user", None):
+            return f"@{mention.user.username}"
+        return self.caption
+
+    def _create_text_clip(
+        self,
+        text: str,
+        color: str,
+        font: str,
+        fontsize: int,
+        max_width: int,
+        bg_color: Optional[str] = None,
+        pos_left: Optional[float] = None,
+        pos_top: float = 0,
+    ):
+        """
+        Create a positioned text clip, the fade-in is applied by build_main
+
+        Parameters
+        ----------
+        text : str
+            Text to render
+        color : str
+            Color of text
+        font : str
+            Name of font (or path to a font file)
+        fontsize : int
+            Size of font
+        max_width : int
+            Width of the clip, the rendered text is scaled to it
+        bg_color : str, optional
+            Background color, default value is None (transparent)
+        pos_left : float, optional
+            Left position, default value is None (centered)
+        pos_top : float, optional
+            Top position, moved up if the clip does not fit the frame
+
+        Returns
+        -------
+        ImageClip
+            An object of ImageClip or None when text is empty
+        """
+        from moviepy.video.VideoClip import ImageClip
+
+        if not text:
+            return None
+        arr = _render_text(text, color, font, fontsize, max_width, bg_color)
+        height, width = arr.shape[:2]
+        if pos_left is None:
+            pos_left = (self.width - width) / 2
+        offset = (pos_top + height) - self.height
+        if offset > 0:
+            pos_top -= offset + 90
+        return ImageClip(arr, transparent=True).set_position((pos_left, pos_top))
+
+    def _adjust_mention_geometry(self, mention: StoryMention, text_clip) -> None:
+        """
+        Place the mention over the caption clip
+
+        Parameters
+        ----------
+        mention : StoryMention
+            Mention to update in place
+        text_clip : ImageClip
+            Positioned caption clip
+        """
+        _, text_top = text_clip.pos(0)
+        mention.x = 0.49892962  # approximately center
+        mention.y = (text_top + text_clip.size[1] / 2) / self.height
+        mention.width = text_clip.size[0] / self.width
+        mention.height = text_clip.size[1] / self.height
+
+    def _calculate_duration(self, clip, max_duration: int = 0) -> int:
+        """
+        Calculate story duration in whole seconds
+
+        Parameters
+        ----------
+        clip : (VideoFileClip, ImageClip)
+            Main clip of the story
+        max_duration : int, optional
+            Requested duration, default value is 0 (clip duration)
+
+        Returns
+        -------
+        int
+            Duration limited by the clip duration
+        """
+        duration = max_duration
+        if getattr(clip, "duration", None):
+            if duration > int(clip.duration) or not duration:
+                duration = int(clip.duration)
+        return duration
+
+    def _split_video(self, path: str, duration: int) -> List[str]:
+        """
+        Split an encoded video into SEGMENT_DURATION parts without re-encoding
+
+        Segments are cut concurrently, each by its own ffmpeg stream copy.
+
+        Parameters
+        ----------
+        path : str
+            Path to the encoded video
+        duration : int
+            Duration of the video in seconds
+
+        Returns
+        -------
+        List[str]
+            Paths of the segments in playback order
+        """
+        jobs = []
+        try:
+            for start in range(0, duration, SEGMENT_DURATION):
+                # ffmpeg -y で上書きするため、出力先は排他的に作成しておく
+                with tempfile.NamedTemporaryFile(suffix=".mp4", delete=False) as fp:
+                    jobs.append((path, start, min(start + SEGMENT_DURATION, duration), fp.name))
+            with ThreadPoolExecutor(max_workers=min(len(jobs), os.cpu_count() or 1)) as executor:
+                return list(executor.map(lambda job: _copy_segment(*job), jobs))
+        except Exception:
+            for job in jobs:
+                Path(job[3]).unlink(missing_ok=True)
+            raise
 
     def video(self, max_duration: int = 0, font: str = "Arial", fontsize: int = 100, color: str = "white", link: str = "") -> StoryBuild:
         """
@@ -242,7 +729,9 @@ class StoryBuilder:
         StoryBuild
             An object of StoryBuild
         """
-        clip = VideoFileClip(str(self.path), has_mask=True)
+        from moviepy.video.io.VideoFileClip import VideoFileClip
+
+        clip = VideoFileClip(str(self.path), has_mask=_has_alpha(self.path))
         build = self.build_main(clip, max_duration, font, fontsize, color, link)
         clip.close()
         return build
@@ -270,12 +759,18 @@ class StoryBuilder:
         StoryBuild
             An object of StoryBuild
         """
+        from moviepy.video.VideoClip import ImageClip
 
+        # 画像は静止しているので、フレーム毎ではなく一度だけリサイズする
         with Image.open(self.path) as im:
             image_width, image_height = im.size
-
-        width_reduction_percent = self.width / float(image_width)
-        height_in_ratio = int(float(image_height) * width_reduction_percent)
-
-        clip = ImageClip(str(self.path)).resize(width=self.width, height=height_in_ratio)
+            width_reduction_percent = self.width / float(image_width)
+            height_in_ratio = int(float(image_height) * width_reduction_percent)
+            mode = "RGBA" if im.mode in ("RGBA", "LA") or "transparency" in im.info else "RGB"
+            if mode == "RGB":
+                # JPEG は DCT スケーリングで必要な解像度までしかデコードしない
+                im.draft(mode, (self.width, height_in_ratio))
+            resized = im.convert(mode).resize((self.width, height_in_ratio), Image.LANCZOS)
+
+        clip = ImageClip(np.asarray(resized))
         return self.build_main(clip, max_duration or 15, font, fontsize, color, link)
@@ -0,0 +1,202 @@
+import importlib
+import os
+import re
+import subprocess
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+import numpy as np
+from moviepy.video.io.VideoFileClip import VideoFileClip
+from PIL import Image
+
+import instagrapi.story
+from instagrapi.story import (
+    SEGMENT_DURATION,
+    X264_PARAMS,
+    StoryBuilder,
+    _ffmpeg_binary,
+    _has_alpha,
+    _load_font,
+)
+
+
+def probe_duration(path):
+    """Duration of a media file in seconds, parsed from ffmpeg's stream info"""
+    proc = subprocess.run(
+        [_ffmpeg_binary(), "-hide_banner", "-i", str(path)],
+        capture_output=True,
+        text=True,
+    )
+    hours, minutes, seconds = re.search(r"Duration: (\d+):(\d+):([\d.]+)", proc.stderr).groups()
+    return int(hours) * 3600 + int(minutes) * 60 + float(seconds)
+
+
+def has_audio(path):
+    """Whether a media file has an audio stream"""
+    proc = subprocess.run(
+        [_ffmpeg_binary(), "-hide_banner", "-i", str(path)],
+        capture_output=True,
+        text=True,
+    )
+    return "Audio:" in proc.stderr
+
+
+def lavfi(destination, source, *params):
+    """Generate a test input with ffmpeg's lavfi sources"""
+    subprocess.run(
+        [_ffmpeg_binary(), "-y", "-loglevel", "error", "-f", "lavfi", "-i", source, *params, str(destination)],
+        check=True,
+    )
+    return destination
+
+
+class StoryBuilderTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.tmp = Path(self.tmpdir.name)
+        self.outputs = []
+
+    def tearDown(self):
+        for path in self.outputs:
+            if os.path.exists(path):
+                os.remove(path)
+        self.tmpdir.cleanup()
+
+    def build(self, build):
+        self.outputs.extend([str(build.path), *map(str, build.paths)])
+        return build
+
+    def photo_path(self, size=(720, 1280)):
+        path = self.tmp / "photo.jpg"
+        Image.new("RGB", size, "red").save(path)
+        return path
+
+    def test_moviepy_version(self):
+        with mock.patch("importlib.metadata.version", return_value="2.1.2"):
+            with self.assertRaisesRegex(Exception, "moviepy==1.0.3"):
+                importlib.reload(instagrapi.story)
+        importlib.reload(instagrapi.story)
+
+    def test_norm_rect(self):
+        builder = StoryBuilder(self.photo_path())
+        self.assertEqual(builder._norm_rect(160, 640, 400, 88), (0.2222222, 0.5, 0.5555556, 0.06875))
+
+    def test_load_font_fallback_size(self):
+        # A missing font falls back to Pillow's default font at the requested size
+        left, top, right, bottom = _load_font("NoSuchFont", 100).getbbox("H")
+        self.assertGreater(bottom - top, 50)
+
+    def test_has_alpha(self):
+        opaque = lavfi(self.tmp / "opaque.mp4", "color=c=red:s=64x64:d=1", "-c:v", "libx264", "-pix_fmt", "yuv420p")
+        transparent = lavfi(self.tmp / "transparent.mov", "color=c=red@0.5:s=64x64:d=1,format=rgba", "-c:v", "png")
+        self.assertFalse(_has_alpha(opaque))
+        self.assertTrue(_has_alpha(transparent))
+
+    def test_photo_duration(self):
+        build = self.build(StoryBuilder(self.photo_path()).photo(max_duration=5))
+        self.assertAlmostEqual(probe_duration(build.path), 5, delta=0.1)
+        self.assertEqual(build.paths, [])
+
+    def test_photo_x264_params(self):
+        with mock.patch("instagrapi.story.subprocess.run") as run:
+            StoryBuilder(self.photo_path())._encode_still(
+                np.zeros((1280, 720, 3), dtype="uint8"), str(self.tmp / "out.mp4"), 5
+            )
+        args = run.call_args[0][0]
+        params = args[args.index("libx264") + 1:args.index(str(self.tmp / "out.mp4"))]
+        expected = [("stillimage" if arg == "zerolatency" else arg) for arg in X264_PARAMS]
+        self.assertEqual(params, expected)
+
+    def test_photo_text_fadein(self):
+        builder = StoryBuilder(self.photo_path(), caption="caption")
+        build = self.build(builder.photo(max_duration=5, link="https://github.com/", font="NoSuchFont"))
+        self.assertAlmostEqual(probe_duration(build.path), 5, delta=0.1)
+        clip = VideoFileClip(str(build.path))
+        try:
+            # The caption and link fade in over 3 seconds, the frame is still changing at first
+            self.assertGreater(abs(clip.get_frame(0.5).astype(int) - clip.get_frame(4).astype(int)).max(), 64)
+            self.assertLessEqual(abs(clip.get_frame(3.5).astype(int) - clip.get_frame(4.5).astype(int)).max(), 16)
+        finally:
+            clip.close()
+
+    def test_photo_split(self):
+        build = self.build(StoryBuilder(self.photo_path()).photo(max_duration=20))
+        self.assertAlmostEqual(probe_duration(build.path), 20, delta=0.1)
+        durations = [probe_duration(path) for path in build.paths]
+        self.assertEqual(len(durations), 2)
+        self.assertAlmostEqual(durations[0], SEGMENT_DURATION, delta=0.1)
+        self.assertAlmostEqual(sum(durations), 20, delta=0.1)
+
+    def test_no_audio_track(self):
+        # Silent sources are written without an (empty) AAC track
+        source = lavfi(
+            self.tmp / "silent.mp4",
+            "color=c=green:s=360x640:rate=24:d=2",
+            "-c:v", "libx264", "-pix_fmt", "yuv420p",
+        )
+        video = self.build(StoryBuilder(source).video())
+        photo = self.build(StoryBuilder(self.photo_path()).photo(max_duration=2))
+        self.assertFalse(has_audio(video.path))
+        self.assertFalse(has_audio(photo.path))
+
+    def test_video_full_frame_alpha(self):
+        # A frame-sized source with alpha must still be composited over the black canvas
+        source = lavfi(self.tmp / "alpha.mov", "color=c=red@0.5:s=720x1280:d=1,format=rgba", "-c:v", "png")
+        build = self.build(StoryBuilder(source).video())
+        clip = VideoFileClip(str(build.path))
+        try:
+            self.assertAlmostEqual(int(clip.get_frame(0.5)[640, 360, 0]), 127, delta=8)
+        finally:
+            clip.close()
+
+    def test_video_caption_keeps_audio(self):
+        # Opaque video without background is the base clip of the composite (use_bgclip)
+        source = self.tmp / "source.mp4"
+        subprocess.run(
+            [
+                _ffmpeg_binary(), "-y", "-loglevel", "error",
+                "-f", "lavfi", "-i", "color=c=green:s=360x640:rate=24:d=3",
+                "-f", "lavfi", "-i", "sine=d=3",
+                "-c:v", "libx264", "-pix_fmt", "yuv420p", "-c:a", "aac",
+                str(source),
+            ],
+            check=True,
+        )
+        build = self.build(StoryBuilder(source, caption="caption").video(font="NoSuchFont"))
+        self.assertTrue(has_audio(build.path))
+        clip = VideoFileClip(str(build.path))
+        try:
+            frame = clip.get_frame(2.5)
+            self.assertGreater(int(frame[590, 360, 1]), 100)  # media placed at (180, 270)
+            self.assertLess(int(frame[10, 360].max()), 16)  # black canvas above the media
+            self.assertGreater(int(frame[960:].max()), 128)  # caption below the media
+        finally:
+            clip.close()
+
+    def test_failed_split_removes_outputs(self):
+        photo = self.photo_path()
+        error = subprocess.CalledProcessError(1, "ffmpeg")
+        with mock.patch("tempfile.tempdir", str(self.tmp)):
+            with mock.patch("instagrapi.story._copy_segment", side_effect=error):
+                with self.assertRaises(subprocess.CalledProcessError):
+                    StoryBuilder(photo).photo(max_duration=20)
+        self.assertEqual(sorted(p.name for p in self.tmp.iterdir()), [photo.name])
+
+    def test_video_split_ntsc_rate(self):
+        # 23.976 fps has no frame exactly on the 15 second boundary
+        source = lavfi(
+            self.tmp / "source.mp4",
+            "testsrc=size=360x640:rate=24000/1001:duration=20",
+            "-c:v", "libx264", "-preset", "ultrafast", "-pix_fmt", "yuv420p",
+        )
+        build = self.build(StoryBuilder(source).video())
+        durations = [probe_duration(path) for path in build.paths]
+        self.assertEqual(len(durations), 2)
+        self.assertAlmostEqual(durations[0], SEGMENT_DURATION, delta=0.1)
+        self.assertAlmostEqual(sum(durations), probe_duration(build.path), delta=0.1)
+
+
+if __name__ == "__main__":
+    unittest.main()